@@ -4,21 +4,154 @@ Demonstrates modern Python development for AWS Delivery Consultant role
 Author: John Anderson
 """
 
+import base64
 import json
 import os
+import random
+import time
+import uuid
 import boto3
 import logging
-from typing import Dict, Any
-from datetime import datetime
-from botocore.exceptions import ClientError
+from typing import Dict, Any, Callable, List, Optional, Tuple
+from datetime import datetime, timezone
+from decimal import Decimal
+from boto3.dynamodb.conditions import Key
+from boto3.dynamodb.types import TypeSerializer
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError
+
+try:
+    # Faster JSON encode/decode when available (e.g. provided via a Lambda layer)
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore[assignment]
 
 # Configure logging
+# Skip thread and process lookups per record; neither the text nor the JSON
+# Lambda log format uses them (see "Optimization" in the logging HOWTO).
+# Source-file lookup stays on: the JSON format's `location` field needs it.
+logging.logThreads = False
+logging.logProcesses = False
+logging.logMultiprocessing = False
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
 # Initialize AWS services
-dynamodb = boto3.resource('dynamodb')
-ssm = boto3.client('ssm')
+# Larger connection pool + keepalive avoids re-handshaking TLS under concurrency
+_boto_config = Config(
+    max_pool_connections=50,
+    retries={'mode': 'adaptive', 'max_attempts': 5},
+    tcp_keepalive=True
+)
+# Explicit session shared by both services (same as boto3's default session;
+# each client still keeps its own connection pool)
+_session = boto3.session.Session()
+dynamodb = _session.resource('dynamodb', config=_boto_config)
+ssm = _session.client('ssm', config=_boto_config)
+
+# Reused across warm invocations; populated on first request
+TABLE_NAME_PARAMETER = '/demo-app/dynamodb/table-name'
+_TABLE_NAME: Optional[str] = None
+_CUSTOMER_SERVICE: Optional['CustomerService'] = None
+
+
+def _parse_ttl_days(value: Optional[str]) -> int:
+    """Parse TTL_DAYS; missing or invalid values disable expiry"""
+    try:
+        return max(0, int(value)) if value is not None else 0
+    except ValueError:
+        return 0
+
+
+# Item expiry, fixed for the container's lifetime
+_TTL_SECONDS = _parse_ttl_days(os.getenv('TTL_DAYS')) * 86400
+
+# Fields every customer payload must provide
+_REQUIRED_FIELDS = frozenset({'name', 'email', 'company'})
+
+# GSI used to list customers newest-first without a table scan
+STATUS_INDEX_NAME = 'status-created_at-index'
+# LastEvaluatedKey attributes for that index (table key + index key)
+_CURSOR_KEYS = frozenset({'customer_id', 'status', 'created_at'})
+_LIST_PROJECTION = '#cid, #n, email, company, created_at'
+_LIST_PROJECTION_NAMES = {'#cid': 'customer_id', '#n': 'name'}
+
+# BatchWriteItem limits and UnprocessedItems retry policy (exponential backoff, full jitter)
+_BATCH_SIZE = 25
+_BATCH_MAX_ATTEMPTS = 5
+_BATCH_BACKOFF_BASE_SECONDS = 0.05
+_BATCH_BACKOFF_CAP_SECONDS = 1.0
+
+# Short-lived per-container cache of list responses (stale-for-freshness tradeoff)
+_LIST_CACHE_TTL_SECONDS = 2.0
+_LIST_CACHE_MAX_ENTRIES = 4
+
+
+def _json_default(obj: Any) -> Any:
+    """Serialize DynamoDB Decimal values as JSON numbers"""
+    if isinstance(obj, Decimal):
+        return int(obj) if obj == obj.to_integral_value() else float(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _dumps(obj: Any) -> str:
+    """Encode a response payload to a compact JSON string"""
+    if orjson is not None:
+        # orjson emits raw UTF-8 (non-ASCII names included), so no ASCII-only decode
+        return orjson.dumps(obj, default=_json_default).decode()
+    return json.dumps(obj, default=_json_default, separators=(',', ':'))
+
+
+def _loads(raw: Any) -> Any:
+    """Decode a JSON request body (str or bytes)"""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def _floats_to_decimal(obj: Any) -> Any:
+    """Recursively convert floats (which boto3 rejects) to Decimal"""
+    if isinstance(obj, float):
+        return Decimal(str(obj))
+    if isinstance(obj, dict):
+        return {k: _floats_to_decimal(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_floats_to_decimal(v) for v in obj]
+    return obj
+
+
+_TYPE_SERIALIZER = TypeSerializer()
+
+
+def _to_dynamodb_item(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Coerce a parsed JSON object into a DynamoDB-storable item.
+
+    Raises ValueError if a value still can't be stored (e.g. NaN/Infinity or a
+    number beyond DynamoDB's 38-digit precision), so callers can reject just
+    that item instead of failing a whole batch write.
+    """
+    item = _floats_to_decimal(item)
+    try:
+        _TYPE_SERIALIZER.serialize(item)
+    except (TypeError, ArithmeticError) as e:
+        raise ValueError(f"Unsupported attribute value: {e}") from e
+    return item
+
+
+def _encode_cursor(key: Dict[str, Any]) -> str:
+    """Encode a DynamoDB LastEvaluatedKey as an opaque URL-safe cursor"""
+    return base64.urlsafe_b64encode(_dumps(key).encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> Dict[str, Any]:
+    """Decode a cursor produced by _encode_cursor back into an ExclusiveStartKey"""
+    key = _loads(base64.urlsafe_b64decode(cursor.encode()))
+    # Client input: must be exactly a status-created_at-index key of strings
+    if (not isinstance(key, dict) or key.keys() != _CURSOR_KEYS
+            or not all(isinstance(value, str) for value in key.values())):
+        raise ValueError("Invalid pagination cursor")
+    return key
+
 
 class CustomerService:
     """
@@ -31,45 +164,50 @@ class CustomerService:
     
     def __init__(self, table_name: str):
         self.table = dynamodb.Table(table_name)
+        # (limit, last_key) -> (monotonic time cached, serialized body)
+        self._list_cache: Dict[Tuple[int, Optional[str]], Tuple[float, str]] = {}
         
+    @staticmethod
+    def validate_customer(customer_data: Dict[str, Any]) -> None:
+        """Raise ValueError if any required field is missing"""
+        missing_fields = _REQUIRED_FIELDS.difference(customer_data)
+
+        if missing_fields:
+            raise ValueError(f"Missing required fields: {', '.join(sorted(missing_fields))}")
+
+    def _prepare_customer(self, customer_data: Dict[str, Any],
+                          customer_id: Optional[str] = None) -> Dict[str, Any]:
+        """Validate required fields and add id/timestamp/TTL metadata in place"""
+        self.validate_customer(customer_data)
+
+        # Add metadata (single clock read shared by created_at and TTL)
+        now = datetime.now(timezone.utc)
+        customer_data.update({
+            'customer_id': customer_id or f"cust_{uuid.uuid4().hex}",
+            'created_at': now.isoformat(),
+            'status': 'active'
+        })
+        if _TTL_SECONDS > 0:
+            # DynamoDB TTL expects a Unix epoch time in seconds (UTC)
+            customer_data['expires_at'] = int(now.timestamp()) + _TTL_SECONDS
+        return customer_data
+
     def create_customer(self, customer_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new customer with validation and error handling"""
         try:
-            # Validate required fields
-            required_fields = ['name', 'email', 'company']
-            missing_fields = [field for field in required_fields if field not in customer_data]
-            
-            if missing_fields:
-                raise ValueError(f"Missing required fields: {', '.join(missing_fields)}")
-            
-            # Add metadata
-            ttl_days = 0
-            try:
-                ttl_env = os.getenv('TTL_DAYS')
-                if ttl_env is not None:
-                    ttl_days = max(0, int(ttl_env))
-            except Exception:
-                ttl_days = 0
-            expires_at = None
-            if ttl_days > 0:
-                # DynamoDB TTL expects a Unix epoch time in seconds (UTC)
-                expires_at = int((datetime.utcnow().timestamp()) + (ttl_days * 86400))
-
-            customer_data.update({
-                'customer_id': f"cust_{datetime.now().strftime('%Y%m%d%H%M%S')}",
-                'created_at': datetime.now().isoformat(),
-                'status': 'active'
-            })
-            if expires_at is not None:
-                customer_data['expires_at'] = expires_at
-            
-            # Store in DynamoDB
-            self.table.put_item(Item=customer_data)
+            self._prepare_customer(customer_data)
+
+            # Store in DynamoDB; never overwrite an existing customer
+            self.table.put_item(
+                Item=customer_data,
+                ConditionExpression='attribute_not_exists(customer_id)'
+            )
+            self._list_cache.clear()
             
             logger.info("Customer created successfully: %s", customer_data['customer_id'])
             return {
                 'statusCode': 201,
-                'body': json.dumps({
+                'body': _dumps({
                     'message': 'Customer created successfully',
                     'customer_id': customer_data['customer_id']
                 })
@@ -79,89 +217,131 @@ class CustomerService:
             logger.error("Validation error: %s", e)
             return {
                 'statusCode': 400,
-                'body': json.dumps({'error': str(e)})
+                'body': _dumps({'error': str(e)})
             }
         except ClientError as e:
             logger.error("AWS service error: %s", e)
             return {
                 'statusCode': 500,
-                'body': json.dumps({'error': 'Internal server error'})
+                'body': _dumps({'error': 'Internal server error'})
             }
 
-    def list_customers(self, limit: int = 50) -> Dict[str, Any]:
-        """Return up to `limit` customers from DynamoDB (scan for demo)."""
+    def create_customers_batch(self, items: List[Dict[str, Any]],
+                               customer_ids: Optional[List[str]] = None) -> List[str]:
+        """Create many validated customers with BatchWriteItem (25 items per request).
+
+        UnprocessedItems are resent with bounded exponential backoff; if some are
+        still unprocessed after the last attempt a ClientError is raised. Errors on
+        the request itself are retried by the client's retry config. Pass stable
+        `customer_ids` to make retries overwrite rather than duplicate, since a
+        failure can leave earlier 25-item chunks already written.
+        """
+        ids: List[Optional[str]] = list(customer_ids) if customer_ids else [None] * len(items)
+        prepared = [self._prepare_customer(item, customer_id) for item, customer_id in zip(items, ids)]
+        try:
+            for start in range(0, len(prepared), _BATCH_SIZE):
+                self._batch_write_chunk(prepared[start:start + _BATCH_SIZE])
+        finally:
+            # A partial failure may still have written some chunks
+            self._list_cache.clear()
+        logger.info("Batch created %d customers", len(prepared))
+        return [item['customer_id'] for item in prepared]
+
+    def _batch_write_chunk(self, chunk: List[Dict[str, Any]]) -> None:
+        """Write up to 25 items, retrying UnprocessedItems with backoff"""
+        request_items: Dict[str, Any] = {
+            self.table.name: [{'PutRequest': {'Item': item}} for item in chunk]
+        }
+        for attempt in range(_BATCH_MAX_ATTEMPTS):
+            response = dynamodb.batch_write_item(RequestItems=request_items)
+            request_items = response.get('UnprocessedItems') or {}
+            if not request_items:
+                return
+            if attempt < _BATCH_MAX_ATTEMPTS - 1:
+                delay = min(_BATCH_BACKOFF_CAP_SECONDS, _BATCH_BACKOFF_BASE_SECONDS * (2 ** attempt))
+                time.sleep(random.uniform(0, delay))
+        remaining = sum(len(requests) for requests in request_items.values())
+        raise ClientError(
+            {'Error': {'Code': 'UnprocessedItems',
+                       'Message': f"{remaining} items still unprocessed after {_BATCH_MAX_ATTEMPTS} attempts"}},
+            'BatchWriteItem'
+        )
+
+    def list_customers(self, limit: int = 50, last_key: Optional[str] = None) -> Dict[str, Any]:
+        """Return up to `limit` (1-200) active customers, newest first, with cursor pagination."""
         try:
-            limit = max(1, min(limit, 200))  # safety bounds
-            response = self.table.scan(Limit=limit)
+            cache_key = (limit, last_key)
+            cached = self._list_cache.get(cache_key)
+            if cached is not None and time.monotonic() - cached[0] < _LIST_CACHE_TTL_SECONDS:
+                return {'statusCode': 200, 'body': cached[1]}
+
+            query_args: Dict[str, Any] = {
+                'IndexName': STATUS_INDEX_NAME,
+                'KeyConditionExpression': Key('status').eq('active'),
+                'Limit': limit,
+                'ScanIndexForward': False,
+                # Only return the attributes the UI/API consumers need
+                'ProjectionExpression': _LIST_PROJECTION,
+                'ExpressionAttributeNames': _LIST_PROJECTION_NAMES
+            }
+            if last_key:
+                query_args['ExclusiveStartKey'] = _decode_cursor(last_key)
+            response = self.table.query(**query_args)
             items = response.get('Items', [])
+            payload: Dict[str, Any] = {
+                'count': len(items),
+                'items': items
+            }
+            if 'LastEvaluatedKey' in response:
+                payload['last_key'] = _encode_cursor(response['LastEvaluatedKey'])
+            body = _dumps(payload)
+
+            if cache_key not in self._list_cache and len(self._list_cache) >= _LIST_CACHE_MAX_ENTRIES:
+                # Evict the oldest entry (dicts keep insertion order)
+                del self._list_cache[next(iter(self._list_cache))]
+            self._list_cache[cache_key] = (time.monotonic(), body)
             return {
                 'statusCode': 200,
-                'body': json.dumps({
-                    'count': len(items),
-                    'items': items
-                })
+                'body': body
             }
         except ClientError as e:
-            logger.error("AWS service error (scan): %s", e)
+            logger.error("AWS service error (query): %s", e)
             return {
                 'statusCode': 500,
-                'body': json.dumps({'error': 'Internal server error'})
+                'body': _dumps({'error': 'Internal server error'})
             }
 
-def lambda_handler(event: Dict[str, Any], _context: Any) -> Dict[str, Any]:
-    """
-    Main Lambda handler demonstrating enterprise patterns:
-    - CORS handling
-    - Method routing
-    - Error handling
-    - Security headers
-    """
-    
-    # CORS headers
-    base_headers = {
-        'Access-Control-Allow-Origin': '*',
-        'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key',
-        'Access-Control-Allow-Methods': 'GET,POST,PUT,DELETE,OPTIONS'
-    }
 
-    try:
-        http_method = event.get('httpMethod', '')
-        path = event.get('path', '/')
-        # Normalize path to remove stage prefix (e.g., '/dev/customers' -> '/customers')
-        norm_path = path
-        if isinstance(path, str) and path.startswith('/'):
-            parts = path.split('/', 2)
-            # ['', 'stage', 'rest...'] -> keep rest...
-            if len(parts) == 3 and parts[1] in {'dev', 'staging', 'prod'}:
-                norm_path = '/' + parts[2]
-        qs = event.get('queryStringParameters') or {}
+def _get_table_name() -> str:
+    """Resolve the table name once: DDB_TABLE_NAME env var, else SSM"""
+    global _TABLE_NAME
+    if _TABLE_NAME is None:
+        _TABLE_NAME = os.getenv('DDB_TABLE_NAME') or \
+            ssm.get_parameter(Name=TABLE_NAME_PARAMETER)['Parameter']['Value']
+    return _TABLE_NAME
 
-        table_name = ssm.get_parameter(Name='/demo-app/dynamodb/table-name')['Parameter']['Value']
-        customer_service = CustomerService(table_name)
 
-        if http_method == 'OPTIONS':
-            return {'statusCode': 200, 'headers': dict(base_headers)}
-
-        # POST /customers -> create
-        if http_method == 'POST' and norm_path.startswith('/customers'):
-            body = json.loads(event.get('body', '{}'))
-            result = customer_service.create_customer(body)
-            result['headers'] = {**base_headers, 'Content-Type': 'application/json'}
-            return result
-
-        # GET /customers -> list
-        if http_method == 'GET' and norm_path.startswith('/customers'):
-            try:
-                limit = int(qs.get('limit', '50'))
-            except ValueError:
-                limit = 50
-            result = customer_service.list_customers(limit=limit)
-            result['headers'] = {**base_headers, 'Content-Type': 'application/json'}
-            return result
-
-        # GET / -> return tiny HTML UI (no extra infra)
-        if http_method == 'GET':
-            html = r"""
+def _get_customer_service() -> 'CustomerService':
+    """Return the container-wide CustomerService, creating it on first use"""
+    global _CUSTOMER_SERVICE
+    if _CUSTOMER_SERVICE is None:
+        _CUSTOMER_SERVICE = CustomerService(_get_table_name())
+    return _CUSTOMER_SERVICE
+
+
+# CORS headers
+_CORS_HEADERS: Dict[str, str] = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key',
+    'Access-Control-Allow-Methods': 'GET,POST,PUT,DELETE,OPTIONS'
+}
+# Static per-content-type header sets, shared by every response
+_JSON_HEADERS: Dict[str, str] = {**_CORS_HEADERS, 'Content-Type': 'application/json'}
+_HTML_HEADERS: Dict[str, str] = {**_CORS_HEADERS, 'Content-Type': 'text/html; charset=utf-8'}
+_OPTIONS_HEADERS: Dict[str, str] = dict(_CORS_HEADERS)
+
+# Tiny HTML UI served on GET /; built once per container
+_INDEX_HTML = r"""
 <!doctype html>
 <html lang="en">
 <head>
@@ -240,30 +420,173 @@ def lambda_handler(event: Dict[str, Any], _context: Any) -> Dict[str, Any]:
     </body>
 </html>
 """
-            return {
-                'statusCode': 200,
-                'headers': {**base_headers, 'Content-Type': 'text/html; charset=utf-8'},
-                'body': html
-            }
+
+# Static responses, serialized once; returned as-is since the runtime only reads them
+_INDEX_RESPONSE: Dict[str, Any] = {
+    'statusCode': 200,
+    'headers': _HTML_HEADERS,
+    'body': _INDEX_HTML
+}
+_OPTIONS_RESPONSE: Dict[str, Any] = {'statusCode': 200, 'headers': _OPTIONS_HEADERS}
+_405_RESPONSE: Dict[str, Any] = {
+    'statusCode': 405,
+    'headers': _JSON_HEADERS,
+    'body': _dumps({'error': 'Method not allowed'})
+}
+_400_RESPONSE: Dict[str, Any] = {
+    'statusCode': 400,
+    'headers': _JSON_HEADERS,
+    'body': _dumps({'error': 'Bad request'})
+}
+_500_RESPONSE: Dict[str, Any] = {
+    'statusCode': 500,
+    'headers': _JSON_HEADERS,
+    'body': _dumps({'error': 'Internal server error'})
+}
+
+
+def _handle_create(event: Dict[str, Any], _qs: Dict[str, str]) -> Dict[str, Any]:
+    """POST /customers -> create"""
+    raw = event.get('body')
+    if raw and event.get('isBase64Encoded'):
+        raw = base64.b64decode(raw)
+    body = _loads(raw) if raw else {}
+    if not isinstance(body, dict):
+        raise ValueError("Request body must be a JSON object")
+    result = _get_customer_service().create_customer(body)
+    result['headers'] = _JSON_HEADERS
+    return result
+
+
+def _handle_list(_event: Dict[str, Any], qs: Dict[str, str]) -> Dict[str, Any]:
+    """GET /customers -> list"""
+    # Accept padded/signed ASCII integers, reject bad input without raising, and
+    # clamp to 1..200 here only. Values with more than 3 significant digits clamp
+    # without int(), which would raise on very long input (> 4300 digits).
+    raw_limit = (qs.get('limit') or '').strip()
+    negative = raw_limit[:1] == '-'
+    digits = raw_limit[1:] if raw_limit[:1] in ('-', '+') else raw_limit
+    significant = digits.lstrip('0')
+    if not (digits.isascii() and digits.isdigit()):
+        limit = 50
+    elif len(significant) > 3:
+        limit = 1 if negative else 200
+    else:
+        limit = min(200, max(1, int(significant or '0') * (-1 if negative else 1)))
+    result = _get_customer_service().list_customers(limit=limit, last_key=qs.get('last_key'))
+    result['headers'] = _JSON_HEADERS
+    return result
+
+
+def _handle_index(_event: Dict[str, Any], _qs: Dict[str, str]) -> Dict[str, Any]:
+    """GET / (and any other GET path) -> tiny HTML UI (no extra infra)"""
+    return _INDEX_RESPONSE
+
+
+def _sqs_customer_id(message_id: str) -> str:
+    """Derive a stable customer_id from an SQS messageId so redelivery overwrites"""
+    return f"cust_{uuid.uuid5(uuid.NAMESPACE_URL, f'aws:sqs:{message_id}').hex}"
+
+
+def _is_sqs_event(event: Dict[str, Any]) -> bool:
+    """True for SQS event source mapping batches (not S3/SNS/Streams Records)"""
+    records = event.get('Records')
+    if not records:
+        return False
+    return all(isinstance(record, dict) and record.get('eventSource') == 'aws:sqs' for record in records)
+
+
+def _handle_sqs(event: Dict[str, Any]) -> Dict[str, Any]:
+    """SQS batch -> BatchWriteItem; returns partial batch failures for redelivery"""
+    records = event['Records']
+    try:
+        customer_service = _get_customer_service()
+    except (ClientError, BotoCoreError) as e:
+        logger.error("AWS service error (table lookup): %s", e)
+        return {'batchItemFailures': [{'itemIdentifier': r.get('messageId')} for r in records]}
+
+    failures: List[Dict[str, Any]] = []
+    message_ids: List[Any] = []
+    items: List[Dict[str, Any]] = []
+    for record in records:
+        try:
+            item = _loads(record.get('body') or '{}')
+            if not isinstance(item, dict):
+                raise ValueError("Record body must be a JSON object")
+            customer_service.validate_customer(item)
+            item = _to_dynamodb_item(item)
+        except ValueError as e:
+            logger.error("Invalid SQS record %s: %s", record.get('messageId'), e)
+            failures.append({'itemIdentifier': record.get('messageId')})
+            continue
+        message_ids.append(record.get('messageId'))
+        items.append(item)
+
+    if items:
+        try:
+            customer_service.create_customers_batch(
+                items, [_sqs_customer_id(message_id) for message_id in message_ids]
+            )
+        except (ClientError, BotoCoreError) as e:
+            logger.error("Batch write failed: %s", e)
+            failures.extend({'itemIdentifier': message_id} for message_id in message_ids)
+
+    return {'batchItemFailures': failures}
+
+
+_STAGE_PREFIXES: Tuple[str, ...] = ('/dev/', '/staging/', '/prod/')
+
+# (method, first path segment) -> handler; a None path is the method-wide fallback
+_ROUTES: Dict[Tuple[str, Optional[str]], Callable[..., Dict[str, Any]]] = {
+    ('POST', '/customers'): _handle_create,
+    ('GET', '/customers'): _handle_list,
+    ('GET', '/'): _handle_index,
+    ('GET', None): _handle_index
+}
+
+
+def lambda_handler(event: Dict[str, Any], _context: Any) -> Dict[str, Any]:
+    """
+    Main Lambda handler demonstrating enterprise patterns:
+    - CORS handling
+    - Method routing
+    - Error handling
+    - Security headers
+    """
+
+    # SQS event source mapping -> batch create; kept out of the HTTP error
+    # handling so failures always come back as batchItemFailures
+    if _is_sqs_event(event):
+        return _handle_sqs(event)
+
+    try:
+        http_method = event.get('httpMethod', '')
+        # CORS preflight needs neither SSM nor DynamoDB
+        if http_method == 'OPTIONS':
+            return _OPTIONS_RESPONSE
+
+        path = event.get('path', '/')
+        # Normalize path to remove stage prefix (e.g., '/dev/customers' -> '/customers')
+        norm_path = path if isinstance(path, str) and path.startswith('/') else '/'
+        for prefix in _STAGE_PREFIXES:
+            if norm_path.startswith(prefix):
+                # Slice keeps the trailing '/' of the prefix as the new leading '/'
+                norm_path = norm_path[len(prefix) - 1:]
+                break
+        qs = event.get('queryStringParameters') or {}
+
+        # Route on method + first path segment (e.g., '/customers/abc' -> '/customers')
+        route_path = '/' + norm_path[1:].partition('/')[0]
+        handler = _ROUTES.get((http_method, route_path)) or _ROUTES.get((http_method, None))
+        if handler:
+            return handler(event, qs)
 
         # Fallback
-        return {
-            'statusCode': 405,
-            'headers': {**base_headers, 'Content-Type': 'application/json'},
-            'body': json.dumps({'error': 'Method not allowed'})
-        }
+        return _405_RESPONSE
 
     except ValueError as e:
         logger.error("Bad request: %s", e)
-        return {
-            'statusCode': 400,
-            'headers': {**base_headers, 'Content-Type': 'application/json'},
-            'body': json.dumps({'error': 'Bad request'})
-        }
+        return _400_RESPONSE
     except ClientError as e:
         logger.error("AWS client error: %s", e)
-        return {
-            'statusCode': 500,
-            'headers': {**base_headers, 'Content-Type': 'application/json'},
-            'body': json.dumps({'error': 'Internal server error'})
-        }
+        return _500_RESPONSE
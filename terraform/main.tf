@@ -80,6 +80,24 @@ resource "aws_dynamodb_table" "customers" {
     type = "S"
   }
 
+  attribute {
+    name = "status"
+    type = "S"
+  }
+
+  attribute {
+    name = "created_at"
+    type = "S"
+  }
+
+  # List customers newest-first via Query instead of Scan
+  global_secondary_index {
+    name            = "status-created_at-index"
+    hash_key        = "status"
+    range_key       = "created_at"
+    projection_type = "ALL"
+  }
+
   tags = local.common_tags
 
   ttl {
@@ -125,12 +143,16 @@ data "aws_iam_policy_document" "lambda_policy" {
     sid     = "DynamoDBAccess"
     actions = [
       "dynamodb:PutItem",
+      "dynamodb:BatchWriteItem",
       "dynamodb:GetItem",
       "dynamodb:UpdateItem",
       "dynamodb:Scan",
       "dynamodb:Query"
     ]
-    resources = [aws_dynamodb_table.customers.arn]
+    resources = [
+      aws_dynamodb_table.customers.arn,
+      "${aws_dynamodb_table.customers.arn}/index/*"
+    ]
   }
   statement {
     sid     = "SSMGetParameter"
@@ -177,7 +199,9 @@ resource "aws_lambda_function" "customer_api" {
 # API Gateway REST API
 resource "aws_api_gateway_rest_api" "api" {
   name = "${local.name_prefix}-api"
-  tags = local.common_tags
+  # Let API Gateway gzip responses (HTML UI, customer lists) for clients that accept it
+  minimum_compression_size = "1024"
+  tags                     = local.common_tags
 }
 
 resource "aws_api_gateway_resource" "customers" {
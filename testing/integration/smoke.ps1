@@ -3,6 +3,7 @@
 # - GET /customers
 # - POST /customers
 # - GET /customers again
+# - GET /customers page 2 via last_key
 
 param(
   [string]$ApiBase
@@ -47,6 +48,19 @@ try {
   if ($null -eq $list2.count -or $null -eq $list2.items) { Fail 'Second GET /customers failed.' }
   Write-Host "Final count: $($list2.count)"
 
+  # GET /customers page 2 via the last_key cursor (at least one customer exists now)
+  $page1 = Invoke-RestMethod -Uri ("{0}/customers?limit=1" -f $api) -Method GET
+  if ($page1.count -ne 1) { Fail "GET /customers?limit=1 returned $($page1.count) items." }
+  if ($page1.PSObject.Properties.Name -contains 'last_key' -and -not [string]::IsNullOrWhiteSpace($page1.last_key)) {
+    $cursor = [uri]::EscapeDataString($page1.last_key)
+    $page2 = Invoke-RestMethod -Uri ("{0}/customers?limit=1&last_key={1}" -f $api, $cursor) -Method GET
+    if ($null -eq $page2.count -or $null -eq $page2.items) { Fail 'GET /customers page 2 did not return expected shape.' }
+    if ($page2.count -gt 0 -and $page2.items[0].customer_id -eq $page1.items[0].customer_id) { Fail 'Page 2 repeated the page 1 customer.' }
+    Write-Host "Page 2 count: $($page2.count)"
+  } else {
+    Write-Host 'Only one page of customers; skipped page 2 check.'
+  }
+
   Pop-Location
   Write-Host 'Smoke test PASSED.'
   exit 0